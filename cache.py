@@ -0,0 +1,177 @@
+"""
+Response caching for LLM calls
+
+Identical prompts (webhook redeliveries, test replays) would otherwise pay
+a full LLM round-trip each time. This module stores parsed JSON responses
+on disk keyed by a hash of (model + prompt) so repeats return in microseconds.
+
+It also provides a semantic cache: dialogs that are near-duplicates of an
+already-analyzed call (same question phrased slightly differently) are matched
+by embedding similarity and reuse the stored analysis instead of paying for
+another LLM call.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+CACHE_DIR = Path("llm_cache")
+SEMANTIC_CACHE_DIR = Path("sem_cache")
+SEMANTIC_CACHE_FILE = SEMANTIC_CACHE_DIR / "entries.jsonl"
+
+# Ensure cache directories exist
+CACHE_DIR.mkdir(exist_ok=True)
+SEMANTIC_CACHE_DIR.mkdir(exist_ok=True)
+
+def make_cache_key(model: str, prompt: str) -> str:
+    """
+    Build a deterministic cache key for a model + prompt pair
+    """
+    return hashlib.sha256((model + prompt).encode("utf-8")).hexdigest()
+
+def get_cached_response(key: str) -> Optional[Dict[str, Any]]:
+    """
+    Look up a cached LLM response by key
+
+    Returns:
+        The parsed JSON response if present, None on a cache miss
+    """
+    cache_file = CACHE_DIR / f"{key}.json"
+    try:
+        if cache_file.exists():
+            with open(cache_file, "r", encoding="utf-8") as f:
+                logger.info(f"LLM cache hit: {key[:12]}")
+                return json.load(f)
+        return None
+    except Exception as e:
+        logger.warning(f"Error reading LLM cache entry {key[:12]}: {str(e)}")
+        return None
+
+def set_cached_response(key: str, response: Dict[str, Any]) -> bool:
+    """
+    Store a parsed LLM response under the given key
+
+    Returns:
+        bool: True if stored successfully, False otherwise
+    """
+    cache_file = CACHE_DIR / f"{key}.json"
+    try:
+        with open(cache_file, "w", encoding="utf-8") as f:
+            json.dump(response, f, ensure_ascii=False)
+        return True
+    except Exception as e:
+        logger.warning(f"Error writing LLM cache entry {key[:12]}: {str(e)}")
+        return False
+
+class TTLCache:
+    """Minimal in-process cache whose entries expire after a fixed TTL"""
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._store: Dict[str, tuple] = {}
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if absent or expired"""
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if time.monotonic() > expires:
+            del self._store[key]
+            return None
+        return value
+
+    def set(self, key: str, value: Any):
+        """Store a value, evicting expired (then oldest) entries when full"""
+        if len(self._store) >= self.maxsize:
+            now = time.monotonic()
+            self._store = {k: v for k, v in self._store.items() if v[0] > now}
+            while len(self._store) >= self.maxsize:
+                self._store.pop(next(iter(self._store)))
+        self._store[key] = (time.monotonic() + self.ttl, value)
+
+class SemanticCache:
+    """Embedding-similarity cache for near-duplicate call analyses"""
+
+    def __init__(self, threshold: Optional[float] = None):
+        # Cosine similarity above which a prior analysis is considered a hit
+        self.threshold = threshold if threshold is not None else float(
+            os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")
+        )
+        self._entries: List[Dict[str, Any]] = []
+        self._load_entries()
+
+    def _load_entries(self):
+        """Load persisted (embedding, response) entries into memory"""
+        try:
+            if SEMANTIC_CACHE_FILE.exists():
+                with open(SEMANTIC_CACHE_FILE, "r", encoding="utf-8") as f:
+                    for line in f:
+                        line = line.strip()
+                        if line:
+                            self._entries.append(json.loads(line))
+                logger.info(f"Loaded {len(self._entries)} semantic cache entries")
+        except Exception as e:
+            logger.warning(f"Error loading semantic cache: {str(e)}")
+            self._entries = []
+
+    def lookup(self, embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """
+        Return the stored response whose embedding is most similar to the
+        query, or None if nothing clears the similarity threshold
+
+        OpenAI embeddings are unit-normalized, so the dot product is the
+        cosine similarity; a brute-force scan is plenty for this cache size.
+        """
+        best_score = 0.0
+        best_response = None
+
+        for entry in self._entries:
+            score = sum(a * b for a, b in zip(embedding, entry["embedding"]))
+            if score > best_score:
+                best_score = score
+                best_response = entry["response"]
+
+        if best_response is not None and best_score >= self.threshold:
+            logger.info(f"Semantic cache hit (similarity: {best_score:.3f})")
+            return best_response
+        return None
+
+    def add(self, embedding: List[float], response: Dict[str, Any]) -> bool:
+        """
+        Store an (embedding, response) pair in memory and on disk
+
+        Returns:
+            bool: True if stored successfully, False otherwise
+        """
+        entry = {"embedding": embedding, "response": response}
+        self._entries.append(entry)
+        try:
+            with open(SEMANTIC_CACHE_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            return True
+        except Exception as e:
+            logger.warning(f"Error persisting semantic cache entry: {str(e)}")
+            return False
+
+def clear_cache() -> bool:
+    """
+    Remove all cached LLM responses (use with caution!)
+    """
+    try:
+        for cache_file in CACHE_DIR.glob("*.json"):
+            cache_file.unlink()
+        logger.info("Cleared LLM response cache")
+        return True
+    except Exception as e:
+        logger.error(f"Error clearing LLM cache: {str(e)}")
+        return False
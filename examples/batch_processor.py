@@ -7,11 +7,12 @@ and sends them to the analyzer API for processing.
 """
 
 import os
-import json
-import requests
+import orjson
+import httpx
 import logging
 from typing import List, Dict, Any
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -22,7 +23,13 @@ class BatchProcessor:
     
     def __init__(self, api_url: str = "http://localhost:8000"):
         self.api_url = api_url
-        self.session = requests.Session()
+        # httpx with HTTP/2 multiplexes requests over kept-alive connections,
+        # unlike requests.Session which is HTTP/1.1 and serial per connection
+        self.session = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=16),
+            timeout=30
+        )
     
     def process_directory(self, transcript_dir: str) -> Dict[str, Any]:
         """
@@ -48,16 +55,20 @@ class BatchProcessor:
         
         logger.info(f"Found {len(json_files)} transcript files to process")
         
-        # Load all transcripts
-        transcripts = []
-        for json_file in json_files:
+        # Load all transcripts in parallel: reads are disk-latency bound and
+        # release the GIL, so a thread pool overlaps them
+        def _load(json_file):
             try:
-                with open(json_file, 'r') as f:
-                    transcript_data = json.load(f)
-                    transcripts.append(transcript_data)
+                with open(json_file, 'rb') as f:
+                    transcript_data = orjson.loads(f.read())
                 logger.info(f"Loaded transcript: {json_file.name}")
+                return transcript_data
             except Exception as e:
                 logger.error(f"Error loading {json_file}: {str(e)}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            transcripts = [t for t in executor.map(_load, json_files) if t is not None]
         
         if not transcripts:
             return {"error": "No valid transcripts loaded"}
@@ -113,8 +124,8 @@ class BatchProcessor:
             Dictionary with analysis result
         """
         try:
-            with open(file_path, 'r') as f:
-                transcript_data = json.load(f)
+            with open(file_path, 'rb') as f:
+                transcript_data = orjson.loads(f.read())
             
             logger.info(f"Processing single transcript: {file_path}")
             
@@ -145,8 +156,8 @@ class BatchProcessor:
             output_file: Path to output file
         """
         try:
-            with open(output_file, 'w') as f:
-                json.dump(results, f, indent=2)
+            with open(output_file, 'wb') as f:
+                f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
             logger.info(f"Results saved to: {output_file}")
         except Exception as e:
             logger.error(f"Error saving results: {str(e)}")
@@ -182,7 +193,7 @@ def main():
         logger.error(f"Processing failed: {results['error']}")
     else:
         logger.info("Processing completed successfully")
-        print(json.dumps(results, indent=2))
+        print(orjson.dumps(results, option=orjson.OPT_INDENT_2).decode())
         
         # Save results if output file specified
         if args.output:
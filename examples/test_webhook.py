@@ -3,23 +3,29 @@
 Webhook Testing Script for Certus Integration
 
 This script tests the webhook endpoint with various scenarios to ensure
-the Certus integration is working correctly.
+the Certus integration is working correctly. Requests run concurrently
+over one async HTTP client, so the suite takes max-of-latencies instead
+of sum-of-latencies.
 """
 
-import requests
+import asyncio
+import httpx
 import json
-import time
 from pathlib import Path
 
 # Configuration
-WEBHOOK_URL = "http://localhost:8000/webhook"
-HEALTH_URL = "http://localhost:8000/health"
-HISTORY_URL = "http://localhost:8000/analysis-history"
+BASE_URL = "http://localhost:8000"
+WEBHOOK_PATH = "/webhook"
+HEALTH_PATH = "/health"
+HISTORY_PATH = "/analysis-history"
 
-def test_server_health():
+# Shared client: keep-alive connections are reused across all tests
+client = httpx.AsyncClient(base_url=BASE_URL)
+
+async def test_server_health():
     """Test if the server is running"""
     try:
-        response = requests.get(HEALTH_URL, timeout=5)
+        response = await client.get(HEALTH_PATH, timeout=5)
         if response.status_code == 200:
             print("✅ Server is healthy")
             return True
@@ -30,7 +36,7 @@ def test_server_health():
         print(f"❌ Cannot connect to server: {e}")
         return False
 
-def test_webhook_basic():
+async def test_webhook_basic():
     """Test basic webhook functionality"""
     payload = {
         "call_id": "test_webhook_001",
@@ -46,9 +52,9 @@ def test_webhook_basic():
             "customer_satisfaction": "low"
         }
     }
-    
+
     try:
-        response = requests.post(WEBHOOK_URL, json=payload, timeout=10)
+        response = await client.post(WEBHOOK_PATH, json=payload, timeout=10)
         if response.status_code == 200:
             result = response.json()
             print(f"✅ Basic webhook test passed")
@@ -63,19 +69,19 @@ def test_webhook_basic():
         print(f"❌ Basic webhook test error: {e}")
         return False
 
-def test_webhook_with_file():
+async def test_webhook_with_file():
     """Test webhook with the sample file"""
     test_file = Path("examples/certus_webhook_test.json")
-    
+
     if not test_file.exists():
         print(f"❌ Test file not found: {test_file}")
         return False
-    
+
     try:
         with open(test_file, 'r') as f:
             payload = json.load(f)
-        
-        response = requests.post(WEBHOOK_URL, json=payload, timeout=10)
+
+        response = await client.post(WEBHOOK_PATH, json=payload, timeout=10)
         if response.status_code == 200:
             result = response.json()
             print(f"✅ File-based webhook test passed")
@@ -90,8 +96,8 @@ def test_webhook_with_file():
         print(f"❌ File-based webhook test error: {e}")
         return False
 
-def test_webhook_error_handling():
-    """Test webhook error handling with invalid payload"""
+async def test_webhook_error_handling():
+    """Test webhook error handling with invalid payloads, all in flight at once"""
     invalid_payloads = [
         # Missing call_id
         {
@@ -112,30 +118,33 @@ def test_webhook_error_handling():
             "dialog": [{"speaker": "invalid", "text": "Hello"}]
         }
     ]
-    
-    for i, payload in enumerate(invalid_payloads):
-        try:
-            response = requests.post(WEBHOOK_URL, json=payload, timeout=10)
-            if response.status_code in [400, 422]:
-                print(f"✅ Error handling test {i+1} passed (expected error)")
-            else:
-                print(f"⚠️ Error handling test {i+1} unexpected: {response.status_code}")
-        except Exception as e:
-            print(f"❌ Error handling test {i+1} failed: {e}")
-
-def check_analysis_results():
+
+    responses = await asyncio.gather(
+        *[client.post(WEBHOOK_PATH, json=payload, timeout=10) for payload in invalid_payloads],
+        return_exceptions=True
+    )
+
+    for i, response in enumerate(responses):
+        if isinstance(response, Exception):
+            print(f"❌ Error handling test {i+1} failed: {response}")
+        elif response.status_code in [400, 422]:
+            print(f"✅ Error handling test {i+1} passed (expected error)")
+        else:
+            print(f"⚠️ Error handling test {i+1} unexpected: {response.status_code}")
+
+async def check_analysis_results():
     """Check if analysis results are being stored"""
     try:
         # Wait a bit for background processing
         print("⏳ Waiting for background processing...")
-        time.sleep(3)
-        
-        response = requests.get(f"{HISTORY_URL}?limit=5", timeout=10)
+        await asyncio.sleep(3)
+
+        response = await client.get(f"{HISTORY_PATH}?limit=5", timeout=10)
         if response.status_code == 200:
             result = response.json()
             total_results = result.get('total_results', 0)
             print(f"✅ Found {total_results} analysis results in storage")
-            
+
             if total_results > 0:
                 latest = result.get('results', [])[0] if result.get('results') else None
                 if latest:
@@ -151,13 +160,12 @@ def check_analysis_results():
         print(f"❌ Error checking analysis results: {e}")
         return False
 
-def test_multiple_webhooks():
-    """Test sending multiple webhooks quickly"""
+async def test_multiple_webhooks():
+    """Test sending multiple webhooks concurrently"""
     print("🔄 Testing multiple webhooks...")
-    
-    success_count = 0
-    for i in range(3):
-        payload = {
+
+    payloads = [
+        {
             "call_id": f"multi_test_{i+1:03d}",
             "dialog": [
                 {"speaker": "user", "text": f"Test call {i+1}"},
@@ -171,50 +179,57 @@ def test_multiple_webhooks():
                 "customer_satisfaction": "low"
             }
         }
-        
-        try:
-            response = requests.post(WEBHOOK_URL, json=payload, timeout=10)
-            if response.status_code == 200:
-                success_count += 1
-                print(f"   ✅ Webhook {i+1} sent successfully")
-            else:
-                print(f"   ❌ Webhook {i+1} failed: {response.status_code}")
-        except Exception as e:
-            print(f"   ❌ Webhook {i+1} error: {e}")
-    
+        for i in range(3)
+    ]
+
+    responses = await asyncio.gather(
+        *[client.post(WEBHOOK_PATH, json=payload, timeout=10) for payload in payloads],
+        return_exceptions=True
+    )
+
+    success_count = 0
+    for i, response in enumerate(responses):
+        if isinstance(response, Exception):
+            print(f"   ❌ Webhook {i+1} error: {response}")
+        elif response.status_code == 200:
+            success_count += 1
+            print(f"   ✅ Webhook {i+1} sent successfully")
+        else:
+            print(f"   ❌ Webhook {i+1} failed: {response.status_code}")
+
     print(f"📊 Multiple webhook test: {success_count}/3 successful")
 
-def main():
+async def main():
     """Run all webhook tests"""
     print("🔗 Certus Webhook Integration Test Suite")
     print("=" * 50)
-    
-    # Test server health
-    if not test_server_health():
-        print("\n❌ Server is not available. Please start the server first:")
-        print("   uvicorn main:app --reload --host 0.0.0.0 --port 8000")
-        return
-    
-    print("\n🧪 Running webhook tests...")
-    
-    # Basic webhook test
-    test_webhook_basic()
-    
-    # File-based webhook test
-    test_webhook_with_file()
-    
-    # Error handling test
-    print("\n🔍 Testing error handling...")
-    test_webhook_error_handling()
-    
-    # Multiple webhooks test
-    print("\n🔄 Testing multiple webhooks...")
-    test_multiple_webhooks()
-    
-    # Check results
-    print("\n📊 Checking analysis results...")
-    check_analysis_results()
-    
+
+    try:
+        # Test server health
+        if not await test_server_health():
+            print("\n❌ Server is not available. Please start the server first:")
+            print("   uvicorn main:app --reload --host 0.0.0.0 --port 8000")
+            return
+
+        print("\n🧪 Running webhook tests...")
+
+        # Basic and file-based webhook tests can run together
+        await asyncio.gather(test_webhook_basic(), test_webhook_with_file())
+
+        # Error handling test
+        print("\n🔍 Testing error handling...")
+        await test_webhook_error_handling()
+
+        # Multiple webhooks test
+        print("\n🔄 Testing multiple webhooks...")
+        await test_multiple_webhooks()
+
+        # Check results
+        print("\n📊 Checking analysis results...")
+        await check_analysis_results()
+    finally:
+        await client.aclose()
+
     print("\n🎉 Webhook testing completed!")
     print("\n📋 Next steps:")
     print("   1. Check the logs for processing details")
@@ -223,4 +238,4 @@ def main():
     print("   4. Configure Certus to use the webhook URL")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    asyncio.run(main())
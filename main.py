@@ -1,7 +1,9 @@
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+import asyncio
 import logging
+import os
 import time
 from typing import List, Dict, Any, Optional
 
@@ -13,8 +15,16 @@ from models import (
 )
 from analyzer import analyzer
 from prefilter import failure_detector
+from prompt_builder import prompt_builder
 from pipeline import pipeline
-from storage import get_analysis_history, get_analysis_stats, clear_analysis_data, backup_analysis_data
+from storage import (
+    save_analysis,
+    save_analysis_async,
+    get_analysis_history,
+    get_analysis_stats,
+    clear_analysis_data,
+    backup_analysis_data
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -36,6 +46,70 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Micro-batching for /analyze-call: independent single-call requests that
+# land within a short window are coalesced into one analyzer batch so they
+# share the prefilter pass and LLM request slots instead of each paying a
+# full round-trip. Window of 0 disables batching.
+MICRO_BATCH_WINDOW_MS = int(os.getenv("MICRO_BATCH_WINDOW_MS", "20"))
+MICRO_BATCH_MAX = int(os.getenv("MICRO_BATCH_MAX", "8"))
+
+_single_call_queue: Optional[asyncio.Queue] = None
+_micro_batch_task: Optional[asyncio.Task] = None
+
+async def _micro_batch_worker():
+    """Coalesce queued (transcript, future) pairs and analyze them together"""
+    loop = asyncio.get_running_loop()
+    while True:
+        items = [await _single_call_queue.get()]
+        deadline = loop.time() + MICRO_BATCH_WINDOW_MS / 1000
+        while len(items) < MICRO_BATCH_MAX and loop.time() < deadline:
+            try:
+                items.append(_single_call_queue.get_nowait())
+            except asyncio.QueueEmpty:
+                await asyncio.sleep(0.001)
+
+        try:
+            results = await analyzer.analyze_batch([t for t, _ in items])
+            for (_, future), result in zip(items, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+
+@app.on_event("startup")
+async def start_micro_batcher():
+    """Start the request-coalescing worker for /analyze-call"""
+    global _single_call_queue, _micro_batch_task
+    if MICRO_BATCH_WINDOW_MS > 0:
+        _single_call_queue = asyncio.Queue()
+        _micro_batch_task = asyncio.create_task(_micro_batch_worker())
+
+@app.on_event("startup")
+async def warmup():
+    """
+    Remove the first-request latency spike: pre-establish the TLS connection
+    and auth to OpenAI, and exercise the prompt templates once
+    """
+    try:
+        # Authenticated round-trip forces TLS handshake + client lazy-init
+        await analyzer.client.models.list()
+        logger.info("Warmed up OpenAI connection and client")
+    except Exception as e:
+        # Warm-up is best-effort; real calls will just connect lazily
+        logger.warning(f"OpenAI warm-up failed: {str(e)}")
+
+    # Warm the prompt builder so template assembly costs nothing on request #1
+    prompt_builder.build_analysis_prompt([])
+
+@app.on_event("shutdown")
+async def close_http_pool():
+    """Close the shared HTTP client and its connection pool"""
+    if _micro_batch_task is not None:
+        _micro_batch_task.cancel()
+    await analyzer.http_client.aclose()
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -46,6 +120,7 @@ async def root():
         "endpoints": {
             "analyze_single": "/analyze-call",
             "analyze_batch": "/analyze-batch",
+            "batch_result": "/batch-result/{batch_id}",
             "pipeline": "/pipeline",
             "ingest": "/ingest-transcript",
             "webhook": "/webhook",
@@ -68,10 +143,10 @@ async def health_check():
     }
 
 @app.post("/analyze-call", response_model=CallAnalysisResponse)
-async def analyze_single_call(transcript: CallTranscript):
+async def analyze_single_call(transcript: CallTranscript, background_tasks: BackgroundTasks):
     """
     Analyze a single call transcript
-    
+
     This endpoint:
     1. Checks if the call likely failed using heuristics
     2. If failed, analyzes it with LLM to detect issues
@@ -79,10 +154,21 @@ async def analyze_single_call(transcript: CallTranscript):
     """
     try:
         logger.info(f"Analyzing call: {transcript.call_id}")
-        
-        # Analyze the transcript
-        result = analyzer.analyze_transcript(transcript)
-        
+
+        if _single_call_queue is not None:
+            # Hand off to the micro-batcher: concurrent single-call requests
+            # within the window ride one analyzer batch (which also persists
+            # each result)
+            future = asyncio.get_running_loop().create_future()
+            await _single_call_queue.put((transcript, future))
+            result = await future
+        else:
+            result = await analyzer.analyze_transcript(transcript)
+
+            # Persist after the response is sent so the write stays off the
+            # request's critical path
+            background_tasks.add_task(save_analysis, result.model_dump(mode="json"))
+
         logger.info(f"Call {transcript.call_id} analysis complete: {result.status}")
         return result
         
@@ -90,19 +176,27 @@ async def analyze_single_call(transcript: CallTranscript):
         logger.error(f"Error analyzing call {transcript.call_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
-@app.post("/analyze-batch", response_model=BatchAnalysisResponse)
+@app.post("/analyze-batch")
 async def analyze_batch_calls(request: BatchAnalysisRequest):
     """
     Analyze multiple call transcripts in batch
-    
+
     This endpoint processes multiple calls efficiently and provides
     summary statistics for the batch.
+
+    With mode="batch" the work is offloaded to OpenAI's Batch API (results
+    within 24h at half price) and a batch_id is returned — poll
+    /batch-result/{batch_id} to collect the analyses.
     """
     try:
+        if request.mode == "batch":
+            logger.info(f"Submitting {len(request.transcripts)} calls to the OpenAI Batch API")
+            return await analyzer.submit_batch_job(request.transcripts)
+
         logger.info(f"Starting batch analysis of {len(request.transcripts)} calls")
-        
-        # Analyze all transcripts
-        results = analyzer.analyze_batch(request.transcripts)
+
+        # Analyze all transcripts concurrently
+        results = await analyzer.analyze_batch(request.transcripts)
         
         # Generate summary statistics
         stats = analyzer.get_analysis_stats(results)
@@ -118,8 +212,26 @@ async def analyze_batch_calls(request: BatchAnalysisRequest):
         logger.error(f"Error in batch analysis: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Batch analysis failed: {str(e)}")
 
+@app.get("/batch-result/{batch_id}")
+async def get_batch_result(batch_id: str):
+    """
+    Poll an OpenAI Batch API job submitted via /analyze-batch (mode="batch")
+
+    Returns the batch status, plus the parsed analysis results once the job
+    has completed.
+    """
+    try:
+        return await analyzer.get_batch_result(batch_id)
+
+    except Exception as e:
+        logger.error(f"Error retrieving batch {batch_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch retrieval failed: {str(e)}")
+
 @app.post("/pipeline")
-async def run_complete_pipeline(request: BatchAnalysisRequest):
+async def run_complete_pipeline(
+    request: BatchAnalysisRequest,
+    stream: bool = Query(False, description="Stream NDJSON events as each call completes")
+):
     """
     🚀 COMPLETE PIPELINE: Analyze → Generate Fixes → Create Summary
     
@@ -134,7 +246,15 @@ async def run_complete_pipeline(request: BatchAnalysisRequest):
     """
     try:
         logger.info(f"Starting complete pipeline for {len(request.transcripts)} calls")
-        
+
+        if stream:
+            # NDJSON stream: clients see each analysis as it finishes instead
+            # of waiting minutes for the whole batch
+            return StreamingResponse(
+                pipeline.process_batch_pipeline_stream(request.transcripts),
+                media_type="application/x-ndjson"
+            )
+
         # Run the complete pipeline
         result = await pipeline.process_batch_pipeline(request.transcripts)
         
@@ -207,7 +327,7 @@ async def generate_detailed_fixes(analysis_result: Dict[str, Any]):
     try:
         logger.info("Generating detailed fixes")
         
-        result = analyzer.generate_detailed_fixes(analysis_result)
+        result = await analyzer.generate_detailed_fixes(analysis_result)
         
         if "error" in result:
             raise HTTPException(status_code=500, detail=result["error"])
@@ -229,7 +349,7 @@ async def generate_summary(analyses: List[Dict[str, Any]]):
     try:
         logger.info(f"Generating summary for {len(analyses)} analyses")
         
-        result = analyzer.generate_summary(analyses)
+        result = await analyzer.generate_summary(analyses)
         
         if "error" in result:
             raise HTTPException(status_code=500, detail=result["error"])
@@ -251,6 +371,8 @@ async def get_system_stats():
         "model": analyzer.model,
         "temperature": analyzer.temperature,
         "max_retries": analyzer.max_retries,
+        "max_concurrency": analyzer.max_concurrency,
+        "llm_base_url": analyzer.base_url or "https://api.openai.com/v1",
         "frustration_keywords_count": len(failure_detector.frustration_keywords),
         "bot_confusion_patterns_count": len(failure_detector.bot_confusion_patterns),
         "short_response_threshold": failure_detector.short_response_threshold
@@ -459,8 +581,11 @@ async def process_certus_webhook(transcript: CallTranscript):
         })
         
         # Analyze the transcript
-        result = analyzer.analyze_transcript(transcript)
-        
+        result = await analyzer.analyze_transcript(transcript)
+
+        # Persist the result (we are already off the request path here)
+        await save_analysis_async(result.model_dump(mode="json"))
+
         # Update metadata with results
         transcript.metadata.update({
             "processing_status": "completed",
@@ -1,5 +1,6 @@
+from functools import cached_property
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal
 from enum import Enum
 
 class Speaker(str, Enum):
@@ -16,6 +17,19 @@ class CallTranscript(BaseModel):
     dialog: List[DialogueTurn]
     metadata: Optional[Dict[str, Any]] = None
 
+    # Structure-of-arrays views of the dialog, computed once per transcript:
+    # hot paths (prefilter scan, length sorts) iterate these flat lists
+    # instead of chasing .speaker/.text attributes on every turn. Cached
+    # properties are excluded from model_dump, so the wire format is
+    # unchanged; dialog is treated as immutable after construction.
+    @cached_property
+    def dialog_speakers(self) -> List["Speaker"]:
+        return [turn.speaker for turn in self.dialog]
+
+    @cached_property
+    def dialog_texts(self) -> List[str]:
+        return [turn.text for turn in self.dialog]
+
 class AnalysisResult(BaseModel):
     intent: str
     bot_response_summary: str
@@ -33,7 +47,13 @@ class CallAnalysisResponse(BaseModel):
 
 class BatchAnalysisRequest(BaseModel):
     transcripts: List[CallTranscript]
+    # "sync" analyzes immediately; "batch" offloads to OpenAI's Batch API
+    # (results within 24h at half price) and returns a batch_id to poll
+    mode: Literal["sync", "batch"] = "sync"
 
 class BatchAnalysisResponse(BaseModel):
     results: List[CallAnalysisResponse]
-    summary: Dict[str, int]  # counts of analyzed, skipped, errors 
\ No newline at end of file
+    # analyzed/skipped/error counts plus float rates (issue_rate,
+    # average_confidence, success_rate) — not int-only, pydantic v2 rejects
+    # fractional floats for int fields instead of truncating like v1 did
+    summary: Dict[str, Any] 
\ No newline at end of file
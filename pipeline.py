@@ -5,27 +5,37 @@ This module provides a seamless pipeline for processing call transcripts
 with automatic analysis, fix generation, and summary creation.
 """
 
-import json
 import logging
+import os
+import secrets
+import time
+import orjson
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from pathlib import Path
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 
 from models import CallTranscript, CallAnalysisResponse
 from analyzer import analyzer
 from prefilter import failure_detector
+from storage import save_analysis_async
 
 logger = logging.getLogger(__name__)
 
+def _write_json_sync(path: Path, obj: Any):
+    """Serialize and write a JSON file; runs in a thread off the event loop"""
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2, default=str))
+
 class CallPipeline:
     """Orchestrates the complete call analysis workflow"""
     
     def __init__(self, storage_path: str = "data"):
         self.storage_path = Path(storage_path)
         self.storage_path.mkdir(exist_ok=True)
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        # Pipeline batches are offline work, so they can coalesce more
+        # transcripts per LLM request than the interactive endpoints
+        self.coalesce_size = int(os.getenv("PIPELINE_COALESCE_SIZE", "10"))
     
     async def process_batch_pipeline(self, transcripts: List[CallTranscript]) -> Dict[str, Any]:
         """
@@ -33,21 +43,23 @@ class CallPipeline:
         
         This is the main endpoint that does everything automatically.
         """
+        # One id for the whole run, success or failure: strftime-based ids
+        # collided when two pipelines started within the same second
+        pipeline_id = f"pipeline_{time.time_ns():x}_{secrets.token_hex(3)}"
+
         try:
             logger.info(f"Starting pipeline for {len(transcripts)} transcripts")
-            
+
             # Step 1: Analyze all transcripts
             analysis_results = await self._analyze_batch(transcripts)
-            
-            # Step 2: Generate detailed fixes for problematic calls
-            fix_results = await self._generate_fixes_for_issues(analysis_results)
-            
-            # Step 3: Create comprehensive summary
-            summary = await self._generate_comprehensive_summary(analysis_results, fix_results)
+
+            # Step 2: Generate per-call fixes and the aggregate summary in
+            # one fused LLM call — both share the same analysis context
+            fix_results, summary = await self._generate_fixes_and_summary(analysis_results)
             
             # Step 4: Save results
             pipeline_result = {
-                "pipeline_id": f"pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                "pipeline_id": pipeline_id,
                 "timestamp": datetime.now().isoformat(),
                 "input_count": len(transcripts),
                 "analysis_results": analysis_results,
@@ -64,8 +76,80 @@ class CallPipeline:
             
         except Exception as e:
             logger.error(f"Pipeline failed: {str(e)}")
-            return {"error": str(e), "pipeline_id": f"pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}"}
+            return {"error": str(e), "pipeline_id": pipeline_id}
     
+    async def process_batch_pipeline_stream(self, transcripts: List[CallTranscript]):
+        """
+        Streaming variant of process_batch_pipeline: yields NDJSON events
+
+        Each analysis is emitted as soon as it completes (coalesced every
+        ~50ms or 16 events to keep HTTP chunk overhead down), so clients see
+        the first result after one LLM call instead of waiting for the whole
+        batch. A final event carries the fused fixes, summary and statistics.
+        """
+        pipeline_id = f"pipeline_{time.time_ns():x}_{secrets.token_hex(3)}"
+        loop = asyncio.get_running_loop()
+
+        yield orjson.dumps({
+            "event": "start",
+            "pipeline_id": pipeline_id,
+            "input_count": len(transcripts)
+        }) + b"\n"
+
+        async def _analyze(index: int, transcript: CallTranscript):
+            try:
+                return index, await analyzer.analyze_transcript(transcript)
+            except Exception as e:
+                return index, CallAnalysisResponse.model_construct(
+                    call_id=transcript.call_id, status="error", error=str(e)
+                )
+
+        results: List[Optional[CallAnalysisResponse]] = [None] * len(transcripts)
+        tasks = [asyncio.create_task(_analyze(i, t)) for i, t in enumerate(transcripts)]
+
+        buffer = []
+        last_flush = loop.time()
+        for finished in asyncio.as_completed(tasks):
+            index, result = await finished
+            results[index] = result
+            await save_analysis_async(result.model_dump(mode="json"))
+
+            buffer.append(orjson.dumps({
+                "event": "analysis",
+                "index": index,
+                "result": result.model_dump(mode="json")
+            }))
+            now = loop.time()
+            if len(buffer) >= 16 or now - last_flush >= 0.05:
+                yield b"\n".join(buffer) + b"\n"
+                buffer = []
+                last_flush = now
+
+        if buffer:
+            yield b"\n".join(buffer) + b"\n"
+
+        fix_results, summary = await self._generate_fixes_and_summary(results)
+        statistics = self._calculate_pipeline_stats(results)
+
+        pipeline_result = {
+            "pipeline_id": pipeline_id,
+            "timestamp": datetime.now().isoformat(),
+            "input_count": len(transcripts),
+            "analysis_results": [r.model_dump(mode="json") for r in results],
+            "fix_results": fix_results,
+            "summary": summary,
+            "statistics": statistics
+        }
+        await self._save_pipeline_result(pipeline_result)
+
+        yield orjson.dumps({
+            "event": "complete",
+            "pipeline_id": pipeline_id,
+            "fix_results": fix_results,
+            "summary": summary,
+            "statistics": statistics
+        }) + b"\n"
+
     async def ingest_transcript(self, transcript: CallTranscript, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Ingest a single transcript with optional metadata
@@ -105,91 +189,42 @@ class CallPipeline:
     async def _analyze_batch(self, transcripts: List[CallTranscript]) -> List[CallAnalysisResponse]:
         """Analyze a batch of transcripts"""
         logger.info(f"Analyzing {len(transcripts)} transcripts")
-        
-        # Use the existing analyzer
-        loop = asyncio.get_event_loop()
-        results = await loop.run_in_executor(
-            self.executor, 
-            analyzer.analyze_batch, 
-            transcripts
-        )
-        
-        return results
-    
-    async def _generate_fixes_for_issues(self, analysis_results: List[CallAnalysisResponse]) -> Dict[str, Any]:
-        """Generate detailed fixes for calls with issues"""
-        logger.info("Generating detailed fixes for problematic calls")
-        
-        fix_results = {}
-        
-        for result in analysis_results:
-            if result.status == "analyzed" and result.analysis and result.analysis.issue_detected:
-                try:
-                    # Convert analysis to dict for fix generation
-                    analysis_dict = {
-                        "intent": result.analysis.intent,
-                        "bot_response_summary": result.analysis.bot_response_summary,
-                        "issue_detected": result.analysis.issue_detected,
-                        "issue_reason": result.analysis.issue_reason,
-                        "suggested_fix": result.analysis.suggested_fix,
-                        "confidence_score": result.analysis.confidence_score
-                    }
-                    
-                    # Generate detailed fixes
-                    loop = asyncio.get_event_loop()
-                    fixes = await loop.run_in_executor(
-                        self.executor,
-                        analyzer.generate_detailed_fixes,
-                        analysis_dict
-                    )
-                    
-                    fix_results[result.call_id] = fixes
-                    
-                except Exception as e:
-                    logger.error(f"Error generating fixes for {result.call_id}: {str(e)}")
-                    fix_results[result.call_id] = {"error": str(e)}
-        
-        return fix_results
+
+        # The analyzer is fully async now, so await it directly; survivors of
+        # the prefilter are coalesced into multi-task LLM requests so a batch
+        # of N problematic calls costs far fewer than N round-trips
+        return await analyzer.analyze_batch(transcripts, coalesce_size=self.coalesce_size)
     
-    async def _generate_comprehensive_summary(self, analysis_results: List[CallAnalysisResponse], fix_results: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate comprehensive summary of all results"""
-        logger.info("Generating comprehensive summary")
-        
-        # Extract analysis objects for summary
-        analysis_objects = []
-        for result in analysis_results:
-            if result.analysis:
-                analysis_objects.append({
-                    "intent": result.analysis.intent,
-                    "bot_response_summary": result.analysis.bot_response_summary,
-                    "issue_detected": result.analysis.issue_detected,
-                    "issue_reason": result.analysis.issue_reason,
-                    "suggested_fix": result.analysis.suggested_fix,
-                    "confidence_score": result.analysis.confidence_score
-                })
-        
-        if analysis_objects:
-            loop = asyncio.get_event_loop()
-            summary = await loop.run_in_executor(
-                self.executor,
-                analyzer.generate_summary,
-                analysis_objects
-            )
-        else:
-            summary = {"error": "No analysis results to summarize"}
-        
-        return summary
+    async def _generate_fixes_and_summary(self, analysis_results: List[CallAnalysisResponse]) -> tuple:
+        """
+        Generate fixes for problematic calls and the overall summary together
+
+        One fused LLM call produces both, since they read the same analysis
+        context; two separate calls would prefill it twice.
+        """
+        logger.info("Generating fixes and summary for analyzed calls")
+
+        # model_dump is C-accelerated and covers every AnalysisResult field,
+        # so no field-by-field dict rebuild per result
+        analyses_by_call = {
+            result.call_id: result.analysis.model_dump()
+            for result in analysis_results
+            if result.analysis
+        }
+
+        if not analyses_by_call:
+            return {}, {"error": "No analysis results to summarize"}
+
+        fused = await analyzer.generate_fixes_and_summary(analyses_by_call)
+        return fused["fixes"], fused["summary"]
     
     async def _analyze_single_background(self, transcript: CallTranscript):
         """Background analysis for single transcript"""
         try:
-            result = await asyncio.get_event_loop().run_in_executor(
-                self.executor,
-                analyzer.analyze_transcript,
-                transcript
-            )
-            
+            result = await analyzer.analyze_transcript(transcript)
+
             # Store the result
+            await save_analysis_async(result.model_dump(mode="json"))
             await self._store_analysis_result(transcript.call_id, result)
             
             logger.info(f"Background analysis completed for {transcript.call_id}")
@@ -198,52 +233,62 @@ class CallPipeline:
             logger.error(f"Background analysis failed for {transcript.call_id}: {str(e)}")
     
     async def _store_transcript(self, transcript: CallTranscript):
-        """Store transcript to file"""
+        """Store transcript to file without blocking the event loop"""
         try:
             transcript_file = self.storage_path / f"transcript_{transcript.call_id}.json"
-            with open(transcript_file, 'w') as f:
-                json.dump(transcript.dict(), f, indent=2, default=str)
+            # model_dump of a long transcript is CPU work too — run it in the
+            # same thread as the write instead of on the event loop
+            await asyncio.to_thread(
+                lambda: _write_json_sync(transcript_file, transcript.model_dump(mode="json"))
+            )
         except Exception as e:
             logger.error(f"Error storing transcript {transcript.call_id}: {str(e)}")
-    
+
     async def _store_analysis_result(self, call_id: str, result: CallAnalysisResponse):
-        """Store analysis result to file"""
+        """Store analysis result to file without blocking the event loop"""
         try:
             result_file = self.storage_path / f"analysis_{call_id}.json"
-            with open(result_file, 'w') as f:
-                json.dump(result.dict(), f, indent=2, default=str)
+            await asyncio.to_thread(
+                lambda: _write_json_sync(result_file, result.model_dump(mode="json"))
+            )
         except Exception as e:
             logger.error(f"Error storing analysis result {call_id}: {str(e)}")
-    
+
     async def _save_pipeline_result(self, pipeline_result: Dict[str, Any]):
-        """Save complete pipeline result"""
+        """Save complete pipeline result without blocking the event loop"""
         try:
             pipeline_id = pipeline_result["pipeline_id"]
             result_file = self.storage_path / f"pipeline_{pipeline_id}.json"
-            with open(result_file, 'w') as f:
-                json.dump(pipeline_result, f, indent=2, default=str)
+            await asyncio.to_thread(_write_json_sync, result_file, pipeline_result)
             logger.info(f"Pipeline result saved: {result_file}")
         except Exception as e:
             logger.error(f"Error saving pipeline result: {str(e)}")
     
     def _calculate_pipeline_stats(self, analysis_results: List[CallAnalysisResponse]) -> Dict[str, Any]:
         """Calculate comprehensive pipeline statistics"""
+        # Single pass over the results: the per-status list comprehensions
+        # plus the confidence loop walked a large batch five times over
         total = len(analysis_results)
-        analyzed = len([r for r in analysis_results if r.status == "analyzed"])
-        skipped = len([r for r in analysis_results if r.status == "skipped"])
-        errors = len([r for r in analysis_results if r.status == "error"])
-        
-        issues_detected = 0
-        confidence_scores = []
-        
+        analyzed = skipped = errors = issues_detected = 0
+        confidence_sum = 0.0
+        confidence_count = 0
+
         for result in analysis_results:
+            if result.status == "analyzed":
+                analyzed += 1
+            elif result.status == "skipped":
+                skipped += 1
+            elif result.status == "error":
+                errors += 1
+
             if result.analysis:
                 if result.analysis.issue_detected:
                     issues_detected += 1
-                confidence_scores.append(result.analysis.confidence_score)
-        
-        avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0
-        
+                confidence_sum += result.analysis.confidence_score
+                confidence_count += 1
+
+        avg_confidence = confidence_sum / confidence_count if confidence_count else 0
+
         return {
             "total_calls": total,
             "analyzed": analyzed,
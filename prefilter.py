@@ -1,5 +1,15 @@
-from typing import Dict, List, Any
-from models import CallTranscript, DialogueTurn
+import re
+from collections import Counter
+from typing import Dict, List, Any, Optional
+from models import CallTranscript, DialogueTurn, Speaker
+
+# Optional C extension: a table-driven Aho-Corasick automaton finds every
+# keyword in one linear pass with no per-pattern Python overhead. The
+# compiled-regex path below remains the fallback when it isn't installed.
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 class FailureDetector:
     """Heuristic-based system to detect potentially failed calls"""
@@ -21,56 +31,100 @@ class FailureDetector:
         
         # Short responses that might indicate issues
         self.short_response_threshold = 10
-        
-    def is_call_possibly_failed(self, transcript: CallTranscript) -> Dict[str, Any]:
+
+        # Keyword matching is tiered: each phrase list is compiled into one
+        # regex alternation (a single scan finds any keyword), and when
+        # pyahocorasick is installed the automatons below take over with a
+        # C-level pass. Scanned text is lowercased once upstream, so the
+        # alternations stay case-sensitive literals — that keeps the regex
+        # engine on its fast literal-prefix search instead of the slower
+        # case-folding path.
+        self._frustration_re = re.compile(
+            "|".join(re.escape(k) for k in self.frustration_keywords)
+        )
+        self._confusion_re = re.compile(
+            "|".join(re.escape(p) for p in self.bot_confusion_patterns)
+        )
+
+        # When pyahocorasick is available, prefer its C automaton over the
+        # regex engine for the keyword scans
+        self._frustration_ac = self._build_automaton(self.frustration_keywords)
+        self._confusion_ac = self._build_automaton(self.bot_confusion_patterns)
+
+        # Unresolved-ending markers in the final user turn, as one compiled
+        # alternation: a single scan instead of one substring pass per marker
+        self._ending_re = re.compile(r"\?|help|what|how")
+
+    @staticmethod
+    def _build_automaton(keywords: List[str]):
+        """Compile keywords into an Aho-Corasick automaton, or None"""
+        if ahocorasick is None:
+            return None
+        automaton = ahocorasick.Automaton()
+        for keyword in keywords:
+            automaton.add_word(keyword.lower(), keyword.lower())
+        automaton.make_automaton()
+        return automaton
+
+    def _find_keywords(self, text: str, automaton: Optional[Any], pattern: re.Pattern) -> List[str]:
+        """Return every keyword occurrence in already-lowercased text"""
+        if automaton is not None:
+            return [keyword for _, keyword in automaton.iter(text)]
+        return [m.group(0) for m in pattern.finditer(text)]
+
+    def is_call_possibly_failed(self, transcript: CallTranscript, full_report: bool = True) -> Dict[str, Any]:
         """
         Analyze a call transcript to determine if it likely failed
         Returns a dict with failure probability and reasons
+
+        With full_report=False, detectors stop as soon as the 0.3 failure
+        threshold is crossed — callers that only route on the boolean (the
+        analyzer's prefilter pass) skip the remaining dialog scans on
+        clearly-failed calls. The reported confidence/reasons then only
+        cover the detectors that ran.
         """
         dialog = transcript.dialog
-        
+
         if len(dialog) < 3:
             return {
                 "failed": True,
                 "confidence": 0.8,
-                "reasons": ["Call too short - likely incomplete"]
+                "reasons": ["Call too short - likely incomplete"],
+                "call_length": len(dialog)
             }
-        
+
         failure_indicators = []
         confidence_score = 0.0
-        
-        # Check for user frustration
-        user_frustration = self._detect_user_frustration(dialog)
-        if user_frustration["detected"]:
-            failure_indicators.extend(user_frustration["reasons"])
-            confidence_score += 0.4
-        
-        # Check for bot repetition
-        bot_repetition = self._detect_bot_repetition(dialog)
-        if bot_repetition["detected"]:
-            failure_indicators.extend(bot_repetition["reasons"])
-            confidence_score += 0.3
-        
-        # Check for conversation flow issues
-        flow_issues = self._detect_flow_issues(dialog)
-        if flow_issues["detected"]:
-            failure_indicators.extend(flow_issues["reasons"])
-            confidence_score += 0.2
-        
-        # Check for bot confusion
-        bot_confusion = self._detect_bot_confusion(dialog)
-        if bot_confusion["detected"]:
-            failure_indicators.extend(bot_confusion["reasons"])
-            confidence_score += 0.3
-        
-        # Check for abrupt endings
-        abrupt_ending = self._detect_abrupt_ending(dialog)
-        if abrupt_ending["detected"]:
-            failure_indicators.extend(abrupt_ending["reasons"])
+
+        # Abrupt-ending runs first and scan-free: it only inspects the last
+        # turn, so the fast path can bail before touching the rest
+        abrupt = self._detect_abrupt_ending(dialog)
+        if abrupt["detected"]:
+            failure_indicators.extend(abrupt["reasons"])
             confidence_score += 0.2
-        
+
+        if full_report or confidence_score < 0.3:
+            # Everything the remaining detectors need comes out of one fused
+            # pass over the dialog; they just interpret the counters
+            scan = self._scan(transcript)
+
+            detectors = [
+                (self._detect_user_frustration, 0.4),
+                (self._detect_bot_repetition, 0.3),
+                (self._detect_bot_confusion, 0.3),
+                (self._detect_flow_issues, 0.2),
+            ]
+
+            for detect, weight in detectors:
+                result = detect(scan)
+                if result["detected"]:
+                    failure_indicators.extend(result["reasons"])
+                    confidence_score += weight
+                    if not full_report and confidence_score >= 0.3:
+                        break
+
         failed = confidence_score >= 0.3
-        
+
         return {
             "failed": failed,
             "confidence": min(confidence_score, 1.0),
@@ -78,62 +132,87 @@ class FailureDetector:
             "call_length": len(dialog)
         }
     
-    def _detect_user_frustration(self, dialog: List[DialogueTurn]) -> Dict[str, Any]:
+    def _scan(self, transcript: CallTranscript) -> Dict[str, Any]:
+        """
+        Collect every detector's raw inputs in a single pass over the dialog
+
+        The five detectors used to each walk the dialog themselves — five
+        passes and five rounds of attribute lookups per turn. One fused loop
+        over the transcript's structure-of-arrays views gathers the
+        per-speaker text, the bot response counts and the short-response
+        tally; detectors then just interpret the counters.
+        """
+        user_texts = []
+        bot_texts = []
+        bot_stripped = []
+        short_responses = 0
+
+        # Hot loop: iterate the flat speaker/text arrays (no per-turn
+        # attribute walks) and bind the method lookups to locals so each
+        # turn costs plain LOAD_FASTs
+        user_append = user_texts.append
+        bot_append = bot_texts.append
+        stripped_append = bot_stripped.append
+        threshold = self.short_response_threshold
+        # Enum members are singletons, so the speaker check is a pointer
+        # compare instead of a per-turn string comparison
+        user = Speaker.USER
+
+        for speaker, text in zip(transcript.dialog_speakers, transcript.dialog_texts):
+            if speaker is user:
+                user_append(text)
+            else:
+                bot_append(text)
+                stripped = text.strip()
+                stripped_append(stripped)
+                if len(stripped) < threshold:
+                    short_responses += 1
+
+        # Counter's constructor counts in C, so the dedup tally costs one
+        # pass over the collected list instead of a dict update per turn
+        bot_responses = Counter(bot_stripped)
+
+        # The newline separator keeps keyword matches from spanning turns.
+        # Lowercase each side once here so the keyword scans don't allocate
+        # their own lowered copy per detector.
+        return {
+            "user_text": "\n".join(user_texts).lower(),
+            "bot_text": "\n".join(bot_texts).lower(),
+            "bot_responses": bot_responses,
+            "short_responses": short_responses,
+        }
+
+    def _detect_user_frustration(self, scan: Dict[str, Any]) -> Dict[str, Any]:
         """Detect signs of user frustration or confusion"""
-        reasons = []
-        frustration_count = 0
-        
-        for turn in dialog:
-            if turn.speaker.value == "user":
-                text_lower = turn.text.lower()
-                for keyword in self.frustration_keywords:
-                    if keyword in text_lower:
-                        frustration_count += 1
-                        reasons.append(f"User frustration detected: '{keyword}'")
-                        break
-        
+        matches = self._find_keywords(scan["user_text"], self._frustration_ac, self._frustration_re)
+
         return {
-            "detected": frustration_count > 0,
-            "reasons": reasons,
-            "count": frustration_count
+            "detected": bool(matches),
+            "reasons": [f"User frustration detected: '{kw}'" for kw in matches],
+            "count": len(matches)
         }
     
-    def _detect_bot_repetition(self, dialog: List[DialogueTurn]) -> Dict[str, Any]:
+    def _detect_bot_repetition(self, scan: Dict[str, Any]) -> Dict[str, Any]:
         """Detect if bot is repeating the same responses"""
-        bot_responses = {}
         reasons = []
-        
-        for turn in dialog:
-            if turn.speaker.value == "bot":
-                text = turn.text.strip()
-                if text in bot_responses:
-                    bot_responses[text] += 1
-                else:
-                    bot_responses[text] = 1
-        
-        repeated_responses = [text for text, count in bot_responses.items() if count >= 2]
-        
-        if repeated_responses:
-            reasons.append(f"Bot repeated responses: {len(repeated_responses)} unique responses repeated")
-        
+        repeated = sum(1 for count in scan["bot_responses"].values() if count >= 2)
+
+        if repeated:
+            reasons.append(f"Bot repeated responses: {repeated} unique responses repeated")
+
         return {
-            "detected": len(repeated_responses) > 0,
+            "detected": repeated > 0,
             "reasons": reasons,
-            "repeated_count": len(repeated_responses)
+            "repeated_count": repeated
         }
     
-    def _detect_flow_issues(self, dialog: List[DialogueTurn]) -> Dict[str, Any]:
+    def _detect_flow_issues(self, scan: Dict[str, Any]) -> Dict[str, Any]:
         """Detect conversation flow problems"""
         reasons = []
         
         # Check for very short bot responses
-        short_responses = 0
-        for turn in dialog:
-            if turn.speaker.value == "bot" and len(turn.text.strip()) < self.short_response_threshold:
-                short_responses += 1
-        
-        if short_responses > 2:
-            reasons.append(f"Multiple very short bot responses: {short_responses}")
+        if scan["short_responses"] > 2:
+            reasons.append(f"Multiple very short bot responses: {scan['short_responses']}")
         
         # Check for long gaps in conversation (if timestamps available)
         # This would require timestamp analysis
@@ -143,39 +222,31 @@ class FailureDetector:
             "reasons": reasons
         }
     
-    def _detect_bot_confusion(self, dialog: List[DialogueTurn]) -> Dict[str, Any]:
+    def _detect_bot_confusion(self, scan: Dict[str, Any]) -> Dict[str, Any]:
         """Detect if bot seems confused or uncertain"""
-        reasons = []
-        confusion_count = 0
-        
-        for turn in dialog:
-            if turn.speaker.value == "bot":
-                text_lower = turn.text.lower()
-                for pattern in self.bot_confusion_patterns:
-                    if pattern in text_lower:
-                        confusion_count += 1
-                        reasons.append(f"Bot confusion detected: '{pattern}'")
-                        break
-        
+        matches = self._find_keywords(scan["bot_text"], self._confusion_ac, self._confusion_re)
+
         return {
-            "detected": confusion_count > 0,
-            "reasons": reasons,
-            "count": confusion_count
+            "detected": bool(matches),
+            "reasons": [f"Bot confusion detected: '{kw}'" for kw in matches],
+            "count": len(matches)
         }
     
     def _detect_abrupt_ending(self, dialog: List[DialogueTurn]) -> Dict[str, Any]:
         """Detect if conversation ended abruptly"""
-        reasons = []
-        
         if len(dialog) < 5:
-            reasons.append("Conversation ended very early")
-        
+            # Already decisive — skip the last-turn scan
+            return {
+                "detected": True,
+                "reasons": ["Conversation ended very early"]
+            }
+
         # Check if last user message suggests unresolved issue
-        if dialog and dialog[-1].speaker.value == "user":
-            last_text = dialog[-1].text.lower()
-            if any(keyword in last_text for keyword in ["?", "help", "what", "how"]):
+        reasons = []
+        if dialog[-1].speaker is Speaker.USER:
+            if self._ending_re.search(dialog[-1].text.lower()):
                 reasons.append("Conversation ended with user question/request")
-        
+
         return {
             "detected": len(reasons) > 0,
             "reasons": reasons
@@ -3,7 +3,11 @@ from models import DialogueTurn
 
 class PromptBuilder:
     """Builds structured prompts for LLM analysis of call transcripts"""
-    
+
+    # Display names per speaker, so formatting does a dict lookup instead of
+    # allocating a capitalized copy of the enum value per turn
+    _SPEAKER_NAME = {"user": "User", "bot": "Bot"}
+
     def __init__(self):
         self.system_prompt = """You are an expert AI call quality analyst specializing in restaurant customer service calls. 
 Your job is to analyze conversations between customers and AI bots to identify issues and suggest improvements.
@@ -17,19 +21,15 @@ Key areas to focus on:
 
 Always respond in valid JSON format with the exact fields specified."""
 
-    def build_analysis_prompt(self, dialog: List[DialogueTurn]) -> str:
-        """Build a comprehensive analysis prompt for a call transcript"""
-        
-        # Format the conversation
-        conversation_text = self._format_conversation(dialog)
-        
-        prompt = f"""{self.system_prompt}
-
-ANALYZE THIS RESTAURANT CUSTOMER SERVICE CALL:
+        # Static analysis instructions live in the system message so every
+        # request shares an identical prefix — OpenAI caches prompt prefixes
+        # automatically, but only if no per-call data is interleaved into them.
+        # The per-call dialog goes in the user message, after this prefix.
+        self.analysis_system_prompt = f"""{self.system_prompt}
 
-{conversation_text}
+You will be given a restaurant customer service call to analyze.
 
-Please provide a detailed analysis in the following JSON format:
+Provide a detailed analysis in the following JSON format:
 
 {{
     "intent": "Brief description of what the customer was trying to accomplish",
@@ -58,18 +58,14 @@ Focus on:
 
 Respond only with valid JSON."""
 
-        return prompt.strip()
-    
-    def build_fix_suggestion_prompt(self, analysis_result: dict) -> str:
-        """Build a prompt specifically for generating detailed fix suggestions"""
-        
-        prompt = f"""{self.system_prompt}
-
-BASED ON THIS ANALYSIS, GENERATE SPECIFIC FIXES:
+        # Fix and summary prompts get the same treatment: their instruction
+        # blocks never change between calls, so keeping them byte-identical
+        # in the system message lets the provider reuse the prefix KV cache.
+        self.fix_system_prompt = f"""{self.system_prompt}
 
-{analysis_result}
+You will be given a call analysis; generate specific fixes for it.
 
-Please provide detailed, actionable suggestions in JSON format:
+Provide detailed, actionable suggestions in JSON format:
 
 {{
     "prompt_improvements": [
@@ -97,23 +93,13 @@ Please provide detailed, actionable suggestions in JSON format:
     ],
     "priority": "high/medium/low",
     "estimated_impact": "description of expected improvement"
-}}"""
+}}
 
-        return prompt.strip()
-    
-    def build_summary_prompt(self, multiple_analyses: List[dict]) -> str:
-        """Build a prompt to summarize multiple call analyses"""
-        
-        analyses_text = "\n\n".join([
-            f"Call {i+1}:\n{self._format_analysis(analysis)}"
-            for i, analysis in enumerate(multiple_analyses)
-        ])
-        
-        prompt = f"""{self.system_prompt}
+Respond only with valid JSON."""
 
-SUMMARIZE THESE CALL ANALYSES:
+        self.summary_system_prompt = f"""{self.system_prompt}
 
-{analyses_text}
+You will be given multiple call analyses to summarize.
 
 Provide a summary in JSON format:
 
@@ -137,20 +123,138 @@ Provide a summary in JSON format:
     "recommendations": [
         "specific action items"
     ]
-}}"""
+}}
+
+Respond only with valid JSON."""
+
+        # Fused variant: fixes and summary share the same analysis context,
+        # so asking for both in one response pays for that context once
+        # instead of prefilling it twice.
+        self.fixes_and_summary_system_prompt = f"""{self.system_prompt}
+
+You will be given call analyses keyed by call ID. In a single response,
+generate detailed fixes for every call whose analysis has issue_detected
+set to true, and an aggregate summary across all of the calls.
+
+Respond in JSON format:
+
+{{
+    "fixes": {{
+        "<call_id>": {{
+            "prompt_improvements": [
+                {{
+                    "issue": "description of the prompt problem",
+                    "current_prompt": "what the current prompt likely says",
+                    "suggested_prompt": "improved prompt text",
+                    "rationale": "why this change would help"
+                }}
+            ],
+            "logic_improvements": [
+                {{
+                    "issue": "description of the logic problem",
+                    "current_behavior": "what the bot currently does",
+                    "suggested_behavior": "what the bot should do",
+                    "implementation": "how to implement this change"
+                }}
+            ],
+            "training_suggestions": [
+                {{
+                    "scenario": "type of scenario to train on",
+                    "examples": ["example", "conversations"],
+                    "expected_outcome": "what should happen"
+                }}
+            ],
+            "priority": "high/medium/low",
+            "estimated_impact": "description of expected improvement"
+        }}
+    }},
+    "summary": {{
+        "common_issues": [
+            {{
+                "issue": "description",
+                "frequency": "how often it occurs",
+                "impact": "severity level"
+            }}
+        ],
+        "top_improvements": [
+            {{
+                "improvement": "description",
+                "priority": "high/medium/low",
+                "expected_benefit": "what this would achieve"
+            }}
+        ],
+        "overall_quality_score": 0.0-1.0,
+        "trends": "description of patterns across calls",
+        "recommendations": [
+            "specific action items"
+        ]
+    }}
+}}
+
+Respond only with valid JSON."""
+
+        # Static user-message headers, built once: the build_* methods just
+        # concatenate head + dynamic payload instead of re-rendering an
+        # f-string template per call
+        self._analysis_prompt_head = "ANALYZE THIS RESTAURANT CUSTOMER SERVICE CALL:\n\n"
+        self._fix_prompt_head = "BASED ON THIS ANALYSIS, GENERATE SPECIFIC FIXES:\n\n"
+        self._summary_prompt_head = "SUMMARIZE THESE CALL ANALYSES:\n\n"
+        self._fixes_and_summary_prompt_head = "GENERATE FIXES AND A SUMMARY FOR THESE CALL ANALYSES:\n\n"
+
+    def build_analysis_prompt(self, dialog: List[DialogueTurn]) -> str:
+        """
+        Build the per-call part of an analysis prompt
+
+        Contains only the dynamic conversation; the static rubric lives in
+        analysis_system_prompt so the cacheable prefix stays identical
+        across calls.
+        """
+        return (self._analysis_prompt_head + self._format_conversation(dialog)).strip()
+    
+    def build_fix_suggestion_prompt(self, analysis_result: dict) -> str:
+        """
+        Build the per-call part of a fix suggestion prompt
+
+        The instruction block and output schema live in fix_system_prompt.
+        """
+        return (self._fix_prompt_head + str(analysis_result)).strip()
 
-        return prompt.strip()
+    def build_summary_prompt(self, multiple_analyses: List[dict]) -> str:
+        """
+        Build the per-batch part of a summary prompt
+
+        The instruction block and output schema live in summary_system_prompt.
+        """
+        analyses_text = "\n\n".join([
+            f"Call {i+1}:\n{self._format_analysis(analysis)}"
+            for i, analysis in enumerate(multiple_analyses)
+        ])
+
+        return (self._summary_prompt_head + analyses_text).strip()
     
+    def build_fixes_and_summary_prompt(self, analyses_by_call: dict) -> str:
+        """
+        Build the per-batch part of a fused fixes + summary prompt
+
+        The instruction block and output schema live in
+        fixes_and_summary_system_prompt.
+        """
+        analyses_text = "\n\n".join([
+            f"Call {call_id}:"
+            f"{self._format_analysis(analysis)}"
+            f"Suggested Fix: {analysis.get('suggested_fix', 'N/A')}"
+            for call_id, analysis in analyses_by_call.items()
+        ])
+
+        return (self._fixes_and_summary_prompt_head + analyses_text).strip()
+
     def _format_conversation(self, dialog: List[DialogueTurn]) -> str:
         """Format the conversation for the prompt"""
-        formatted_turns = []
-        
-        for i, turn in enumerate(dialog):
-            speaker = turn.speaker.value.capitalize()
-            text = turn.text.strip()
-            formatted_turns.append(f"Turn {i+1} - {speaker}: {text}")
-        
-        return "\n".join(formatted_turns)
+        names = self._SPEAKER_NAME
+        return "\n".join(
+            f"Turn {i} - {names[turn.speaker.value]}: {turn.text.strip()}"
+            for i, turn in enumerate(dialog, 1)
+        )
     
     def _format_analysis(self, analysis: dict) -> str:
         """Format an analysis result for summary prompts"""
@@ -1,5 +1,10 @@
-import json
+import fcntl
 import logging
+import os
+import aiofiles
+import orjson
+from bisect import bisect_left, bisect_right
+from collections import Counter
 from pathlib import Path
 from datetime import datetime, timezone
 from typing import List, Dict, Any, Optional
@@ -9,26 +14,133 @@ from models import CallAnalysisResponse
 logger = logging.getLogger(__name__)
 
 # Storage configuration
+# Analyses are stored append-only as JSON Lines: one record per line, so a
+# save is a single O(1) append instead of rewriting the whole store
 DATA_DIR = Path("data")
-ANALYSIS_FILE = DATA_DIR / "analyzed_calls.json"
+ANALYSIS_FILE = DATA_DIR / "analyzed_calls.jsonl"
+LEGACY_ANALYSIS_FILE = DATA_DIR / "analyzed_calls.json"
 METADATA_FILE = DATA_DIR / "analysis_metadata.json"
 
 # Ensure data directory exists
 DATA_DIR.mkdir(exist_ok=True)
 
+# Linux FICLONE ioctl (_IOW(0x94, 9, int), from <linux/fs.h>): clones the
+# source file into the destination as a copy-on-write reflink
+_FICLONE = 0x40049409
+
+def _migrate_legacy_store():
+    """
+    One-shot migration of the pre-JSONL array store to JSON Lines
+
+    Without this, the first append to the new store would shadow the legacy
+    file and its records would silently stop appearing in reads.
+    """
+    try:
+        if LEGACY_ANALYSIS_FILE.exists() and not ANALYSIS_FILE.exists():
+            with open(LEGACY_ANALYSIS_FILE, "rb") as f:
+                records = orjson.loads(f.read())
+            with open(ANALYSIS_FILE, "wb") as f:
+                f.write(b"".join(
+                    orjson.dumps(record) + b"\n" for record in records
+                ))
+            # Keep the original around, renamed so it is no longer consulted
+            LEGACY_ANALYSIS_FILE.rename(LEGACY_ANALYSIS_FILE.with_suffix(".json.migrated"))
+            logger.info(f"Migrated {len(records)} legacy analysis records to JSONL storage")
+    except Exception as e:
+        logger.error(f"Error migrating legacy analysis store: {str(e)}")
+
+_migrate_legacy_store()
+
+def _iter_records():
+    """
+    Yield analysis records one at a time without materializing the store
+
+    Read paths that only keep a filtered subset should iterate this instead
+    of load_data() so memory stays flat as the history grows.
+    """
+    if ANALYSIS_FILE.exists():
+        with open(ANALYSIS_FILE, "rb") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield orjson.loads(line)
+    elif LEGACY_ANALYSIS_FILE.exists():
+        # Pre-JSONL stores kept everything in one JSON array
+        with open(LEGACY_ANALYSIS_FILE, "rb") as f:
+            yield from orjson.loads(f.read())
+
+# Parsed-store cache: consecutive reads reuse the parsed list instead of
+# re-parsing the whole file, and because the store is append-only, growth is
+# handled by parsing just the new tail from the remembered byte offset.
+# Rewrites only happen via clear_analysis_data (which invalidates below) and
+# the startup migration, so mtime+size checks are sufficient.
+_CACHE: Dict[str, Any] = {"mtime": None, "data": None, "offset": 0, "ts_ns": None}
+
+def _record_ns(item: Dict[str, Any]) -> int:
+    """Epoch ns for a record, parsing the ISO string only for legacy rows"""
+    ts_ns = item.get("timestamp_ns")
+    if ts_ns is None:
+        timestamp = item.get("timestamp")
+        ts_ns = _to_ns(_parse_timestamp(timestamp)) if timestamp else 0
+    return ts_ns
+
+def _ts_ns_index() -> tuple:
+    """
+    Return (records, epoch-ns array) for the cached store
+
+    Saves append records in arrival order, so the array is sorted and
+    date-range queries can bisect to the relevant slice instead of
+    scanning the whole history. The index lives next to the record cache
+    and is rebuilt only when the store has grown.
+    """
+    data = load_data()
+    records = _CACHE["data"] if _CACHE["data"] is not None else data
+    index = _CACHE["ts_ns"]
+    if index is None or len(index) != len(records):
+        if index is not None and len(index) < len(records):
+            index.extend(_record_ns(item) for item in records[len(index):])
+        else:
+            index = [_record_ns(item) for item in records]
+        _CACHE["ts_ns"] = index
+    return records, index
+
 def load_data() -> List[Dict[str, Any]]:
     """
     Load all analysis data from storage
+
+    Returns a shallow copy of the cached list so later appends don't mutate
+    snapshots already handed to callers; the records themselves are shared
+    and should be treated as read-only.
     """
     try:
-        if ANALYSIS_FILE.exists():
-            with open(ANALYSIS_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                logger.info(f"Loaded {len(data)} analysis records from storage")
-                return data
+        if not ANALYSIS_FILE.exists():
+            data = list(_iter_records())
+            logger.info(f"Loaded {len(data)} analysis records from storage")
+            return data
+
+        stat = ANALYSIS_FILE.stat()
+        if _CACHE["data"] is not None and stat.st_mtime_ns == _CACHE["mtime"]:
+            return list(_CACHE["data"])
+
+        if _CACHE["data"] is not None and stat.st_size >= _CACHE["offset"]:
+            # The store only grew: parse the appended tail, not the file
+            data = _CACHE["data"]
+            start = _CACHE["offset"]
         else:
-            logger.info("No analysis data found, starting with empty storage")
-            return []
+            data = []
+            start = 0
+
+        with open(ANALYSIS_FILE, "rb") as f:
+            f.seek(start)
+            for line in f:
+                line = line.strip()
+                if line:
+                    data.append(orjson.loads(line))
+            offset = f.tell()
+
+        _CACHE.update({"mtime": stat.st_mtime_ns, "data": data, "offset": offset})
+        logger.info(f"Loaded {len(data)} analysis records from storage")
+        return list(data)
     except Exception as e:
         logger.error(f"Error loading analysis data: {str(e)}")
         return []
@@ -44,23 +156,53 @@ def save_analysis(analysis_result: Dict[str, Any]) -> bool:
         bool: True if saved successfully, False otherwise
     """
     try:
-        # Ensure the result has a timestamp
+        # Ensure the result has a timestamp, plus the integer epoch-ns twin
+        # so query paths can compare ints instead of parsing ISO strings
+        now = datetime.now(timezone.utc)
         if "timestamp" not in analysis_result:
-            analysis_result["timestamp"] = datetime.now(timezone.utc).isoformat()
-        
-        # Load existing data
-        data = load_data()
-        
-        # Add the new analysis
-        data.append(analysis_result)
-        
-        # Save back to file
-        with open(ANALYSIS_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        
+            analysis_result["timestamp"] = now.isoformat()
+        if "timestamp_ns" not in analysis_result:
+            analysis_result["timestamp_ns"] = _to_ns(_parse_timestamp(analysis_result["timestamp"]))
+
+        # Append a single JSONL record — O(1) regardless of store size
+        with open(ANALYSIS_FILE, "ab") as f:
+            f.write(orjson.dumps(analysis_result) + b"\n")
+
         logger.info(f"Saved analysis for call {analysis_result.get('call_id', 'unknown')}")
         return True
-        
+
+    except Exception as e:
+        logger.error(f"Error saving analysis: {str(e)}")
+        return False
+
+async def save_analysis_async(analysis_result: Dict[str, Any]) -> bool:
+    """
+    Async variant of save_analysis for use inside the event loop
+
+    Uses aiofiles so persistence does not block other in-flight analyses.
+
+    Args:
+        analysis_result: Dictionary containing the analysis result
+
+    Returns:
+        bool: True if saved successfully, False otherwise
+    """
+    try:
+        # Ensure the result has a timestamp, plus the integer epoch-ns twin
+        # so query paths can compare ints instead of parsing ISO strings
+        now = datetime.now(timezone.utc)
+        if "timestamp" not in analysis_result:
+            analysis_result["timestamp"] = now.isoformat()
+        if "timestamp_ns" not in analysis_result:
+            analysis_result["timestamp_ns"] = _to_ns(_parse_timestamp(analysis_result["timestamp"]))
+
+        # Append a single JSONL record — O(1) regardless of store size
+        async with aiofiles.open(ANALYSIS_FILE, "ab") as f:
+            await f.write(orjson.dumps(analysis_result) + b"\n")
+
+        logger.info(f"Saved analysis for call {analysis_result.get('call_id', 'unknown')}")
+        return True
+
     except Exception as e:
         logger.error(f"Error saving analysis: {str(e)}")
         return False
@@ -76,25 +218,37 @@ def save_batch_analyses(analyses: List[Dict[str, Any]]) -> bool:
         bool: True if all saved successfully, False otherwise
     """
     try:
-        # Load existing data
-        data = load_data()
-        
-        # Add timestamps to new analyses
-        current_time = datetime.now(timezone.utc).isoformat()
+        # Add timestamps (and their epoch-ns twins) to new analyses
+        now = datetime.now(timezone.utc)
+        current_time = now.isoformat()
+        current_ns = _to_ns(now)
         for analysis in analyses:
             if "timestamp" not in analysis:
                 analysis["timestamp"] = current_time
-        
-        # Add all new analyses
-        data.extend(analyses)
-        
-        # Save back to file
-        with open(ANALYSIS_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        
+                analysis["timestamp_ns"] = current_ns
+            elif "timestamp_ns" not in analysis:
+                analysis["timestamp_ns"] = _to_ns(_parse_timestamp(analysis["timestamp"]))
+
+        # Append all records in one syscall — no read-modify-write of the
+        # store. Single-record appends stay within the kernel's atomic write
+        # size, but a batch can exceed it, so hold an advisory lock to keep
+        # concurrent writers (e.g. another worker process) from interleaving
+        # lines into ours.
+        buf = b"".join(
+            orjson.dumps(analysis) + b"\n"
+            for analysis in analyses
+        )
+        fd = os.open(ANALYSIS_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            os.write(fd, buf)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
         logger.info(f"Saved {len(analyses)} analysis records to storage")
         return True
-        
+
     except Exception as e:
         logger.error(f"Error saving batch analyses: {str(e)}")
         return False
@@ -120,126 +274,105 @@ def get_analysis_history(
         List of filtered analysis records
     """
     try:
-        data = load_data()
-        
-        # Apply filters
-        filtered_data = data
-        
-        # Filter by date range
-        if start_date or end_date:
-            filtered_data = _filter_by_date_range(filtered_data, start_date, end_date)
-        
-        # Filter by call ID
-        if call_id:
-            filtered_data = [item for item in filtered_data if item.get("call_id") == call_id]
-        
-        # Filter by status
-        if status:
-            filtered_data = [item for item in filtered_data if item.get("status") == status]
-        
-        # Apply limit
-        if limit and limit > 0:
-            filtered_data = filtered_data[:limit]
-        
+        # Parse the date bounds once into epoch ns, not per record
+        start_ns = _to_ns(_parse_timestamp(start_date)) if start_date else None
+        end_ns = _to_ns(_parse_timestamp(end_date)) if end_date else None
+
+        if start_ns or end_ns:
+            # Records are appended in time order, so a binary search on the
+            # cached epoch-ns index clips the scan to the matching slice —
+            # O(log N) instead of walking the whole history per query
+            records, index = _ts_ns_index()
+            lo = bisect_left(index, start_ns) if start_ns else 0
+            hi = bisect_right(index, end_ns) if end_ns else len(records)
+            candidates = records[lo:hi]
+        else:
+            # No date bounds: stream the store and push the remaining
+            # filters down to each record as it is parsed
+            candidates = _iter_records()
+
+        filtered_data = []
+        for item in candidates:
+            if call_id and item.get("call_id") != call_id:
+                continue
+            if status and item.get("status") != status:
+                continue
+            filtered_data.append(item)
+            if limit and limit > 0 and len(filtered_data) >= limit:
+                break
+
         # Sort by timestamp (newest first)
         filtered_data.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-        
+
         logger.info(f"Retrieved {len(filtered_data)} analysis records with filters")
         return filtered_data
-        
+
     except Exception as e:
         logger.error(f"Error retrieving analysis history: {str(e)}")
         return []
 
-def _filter_by_date_range(
-    data: List[Dict[str, Any]], 
-    start_date: Optional[str], 
-    end_date: Optional[str]
-) -> List[Dict[str, Any]]:
+def _parse_timestamp(value: str) -> datetime:
     """
-    Filter data by date range
+    Parse an ISO timestamp, tolerating a trailing Z
     """
     try:
-        filtered = []
-        
-        for item in data:
-            timestamp = item.get("timestamp")
-            if not timestamp:
-                continue
-                
-            # Parse timestamp
-            try:
-                item_dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            except ValueError:
-                # Try parsing without timezone info
-                item_dt = datetime.fromisoformat(timestamp)
-            
-            # Apply start date filter
-            if start_date:
-                try:
-                    start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-                except ValueError:
-                    start_dt = datetime.fromisoformat(start_date)
-                if item_dt < start_dt:
-                    continue
-            
-            # Apply end date filter
-            if end_date:
-                try:
-                    end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-                except ValueError:
-                    end_dt = datetime.fromisoformat(end_date)
-                if item_dt > end_dt:
-                    continue
-            
-            filtered.append(item)
-        
-        return filtered
-        
-    except Exception as e:
-        logger.error(f"Error filtering by date range: {str(e)}")
-        return data
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        # Try parsing without timezone info
+        return datetime.fromisoformat(value)
+
+def _to_ns(dt: datetime) -> int:
+    """
+    Convert a datetime to epoch nanoseconds, treating naive values as UTC
+    """
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1_000_000_000)
 
 def get_analysis_stats() -> Dict[str, Any]:
     """
     Get statistics about stored analysis data
     """
     try:
-        data = load_data()
-        
-        if not data:
-            return {
-                "total_analyses": 0,
-                "date_range": None,
-                "status_breakdown": {},
-                "call_ids": []
-            }
-        
-        # Calculate statistics
-        total = len(data)
-        status_counts = {}
+        # Stream the store record by record: stats only need counters, so
+        # peak memory stays constant instead of scaling with the history
+        total = 0
+        status_counts = Counter()
         call_ids = set()
-        timestamps = []
-        
-        for item in data:
-            status = item.get("status", "unknown")
-            status_counts[status] = status_counts.get(status, 0) + 1
-            
+        min_ts = max_ts = None
+
+        for item in _iter_records():
+            total += 1
+            status_counts[item.get("status", "unknown")] += 1
+
             call_id = item.get("call_id")
             if call_id:
                 call_ids.add(call_id)
-            
+
+            # ISO-8601 timestamps compare lexicographically, so track the
+            # range on the raw strings and parse only the two endpoints —
+            # not one datetime.fromisoformat per record
             timestamp = item.get("timestamp")
             if timestamp:
-                timestamps.append(timestamp)
-        
+                if min_ts is None or timestamp < min_ts:
+                    min_ts = timestamp
+                if max_ts is None or timestamp > max_ts:
+                    max_ts = timestamp
+
+        if total == 0:
+            return {
+                "total_analyses": 0,
+                "date_range": None,
+                "status_breakdown": {},
+                "call_ids": []
+            }
+
         # Calculate date range
         date_range = None
-        if timestamps:
+        if min_ts:
             try:
-                dates = [datetime.fromisoformat(ts.replace('Z', '+00:00')) for ts in timestamps]
-                min_date = min(dates)
-                max_date = max(dates)
+                min_date = _parse_timestamp(min_ts)
+                max_date = _parse_timestamp(max_ts)
                 date_range = {
                     "earliest": min_date.isoformat(),
                     "latest": max_date.isoformat(),
@@ -251,7 +384,7 @@ def get_analysis_stats() -> Dict[str, Any]:
         return {
             "total_analyses": total,
             "date_range": date_range,
-            "status_breakdown": status_counts,
+            "status_breakdown": dict(status_counts),
             "unique_calls": len(call_ids),
             "call_ids": list(call_ids)[:10]  # First 10 for preview
         }
@@ -267,7 +400,10 @@ def clear_analysis_data() -> bool:
     try:
         if ANALYSIS_FILE.exists():
             ANALYSIS_FILE.unlink()
-            logger.info("Cleared all analysis data")
+        if LEGACY_ANALYSIS_FILE.exists():
+            LEGACY_ANALYSIS_FILE.unlink()
+        _CACHE.update({"mtime": None, "data": None, "offset": 0, "ts_ns": None})
+        logger.info("Cleared all analysis data")
         return True
     except Exception as e:
         logger.error(f"Error clearing analysis data: {str(e)}")
@@ -290,14 +426,23 @@ def backup_analysis_data(backup_path: Optional[str] = None) -> bool:
         
         if backup_path is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = DATA_DIR / f"analyzed_calls_backup_{timestamp}.json"
+            backup_path = DATA_DIR / f"analyzed_calls_backup_{timestamp}.jsonl"
         else:
             backup_path = Path(backup_path)
         
-        # Copy the file
-        import shutil
-        shutil.copy2(ANALYSIS_FILE, backup_path)
-        
+        # Reflink the snapshot when the filesystem supports it (Btrfs, XFS,
+        # ...): a copy-on-write clone is O(1), shares blocks until either
+        # side changes, and — unlike a hard link, which would alias the live
+        # inode and keep growing with every append — is a true
+        # point-in-time copy.
+        try:
+            with open(ANALYSIS_FILE, "rb") as src, open(backup_path, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        except OSError:
+            # No reflink support (ext4, tmpfs, non-Linux) — full copy
+            import shutil
+            shutil.copy2(ANALYSIS_FILE, backup_path)
+
         logger.info(f"Backup created at: {backup_path}")
         return True
         